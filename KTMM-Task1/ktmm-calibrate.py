@@ -0,0 +1,38 @@
+###########
+# IMPORTS #
+###########
+
+
+# Command line arguments
+import argparse
+# Custom modules (lib.calibration loads lib.utils, which must precede lib.classes.mesh)
+from lib.calibration import calibrate
+from lib.classes.mesh import Mesh
+
+
+###########
+# Program #
+###########
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fits config eps, c and lambda to measured temperatures.')
+    parser.add_argument('mesh', help='mesh .obj file')
+    parser.add_argument('config', help='config .json file')
+    parser.add_argument('output', help='fitted config .json file')
+    parser.add_argument('measurements', nargs='+', help='measurements .csv files with (t, T_0, T_1, ...) rows')
+    parser.add_argument('--parameters', nargs='+', choices=['eps', 'c', 'lambda'], default=['eps', 'c', 'lambda'],
+                        help='parameters to fit')
+    parser.add_argument('--starts', type=int, default=1, help='number of multi-start candidates')
+    parser.add_argument('--workers', type=int, default=1, help='number of processes for candidates')
+    parser.add_argument('--seed', type=int, default=None, help='random seed for candidates')
+    args = parser.parse_args()
+    
+    mesh = Mesh(args.mesh)
+    
+    result = calibrate(mesh, args.config, args.measurements, args.output,
+                       tuple(args.parameters), args.starts, args.workers, args.seed)
+    
+    # Debug
+    print('Calibration:', result.message)
+    print('Residual cost:', result.cost)
\ No newline at end of file
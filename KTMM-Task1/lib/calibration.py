@@ -0,0 +1,290 @@
+###########
+# IMPORTS #
+###########
+
+
+# Math
+import math
+# Handy arrays
+import numpy as np
+# .json files
+import json
+# Parallel multi-start
+from concurrent.futures import ProcessPoolExecutor
+# Least squares and stationary solution
+import scipy.optimize as optimize
+# Custom modules
+import lib.utils as utils
+from lib.classes.mesh import Mesh
+from lib.classes.config import Config
+from lib.classes.eq_eval import EquationEvaluator
+from lib.classes.sens_eval import SensitivityEvaluator
+
+# For annotations
+from numpy import ndarray
+
+
+###############
+# Calibration #
+###############
+
+
+def load_measurements(filepaths: list[str]) -> ndarray:
+    """Loads measured temperatures from .csv files.
+
+    Each row is (t, T_0, T_1, ...), empty cells are treated as missing measurements,
+    header rows are skipped.
+
+    Args:
+        filepaths (list[str]): paths to files.
+
+    Returns:
+        ndarray: measurements sorted by time.
+    """
+
+    measurements = []
+    for filepath in filepaths:
+        data = np.atleast_2d(np.genfromtxt(filepath, delimiter=','))
+        # Time and at least one temperature, same columns in every file
+        if data.ndim != 2 or data.shape[1] < 2 or (measurements and data.shape[1] != measurements[0].shape[1]):
+            raise Exception('Invalid measurements')
+        # Skip rows without time (headers)
+        measurements.append(data[~np.isnan(data[:, 0])])
+    if not measurements:
+        raise Exception('Invalid measurements')
+    measurements = np.concatenate(measurements)
+
+    return measurements[np.argsort(measurements[:, 0], kind='stable')]
+
+
+class Calibrator:
+    """Fits eps, c and lambda of config to measured temperatures.
+
+    Configs with 'x0' y0 mode can not be calibrated while stationary equation (without Q_R)
+    has only trivial solution y = 0: its jacobian is singular there, so every iterate raises.
+    """
+
+    def __init__(self, mesh: Mesh, config: dict, measurements: ndarray, parameters=('eps', 'c', 'lambda')) -> None:
+        # Model
+        self.mesh = mesh
+        # Raw .json config
+        self.config = config
+        if not {'eps', 'c', 'lambda', 'Q_R', 'y0', 't'} <= config.keys() or config['y0'][0] not in ('y0', 'x0'):
+            raise Exception('Invalid config')
+
+        # Parameters layout is shared with sensitivity equations
+        evaluator = SensitivityEvaluator(mesh, self.make_config_from_json())
+        self.parameter_names = evaluator.parameter_names
+        self.lambda_indices = evaluator.lambda_indices
+        self.parameters = evaluator.parameters
+        # Parameters to fit
+        self.fitted = np.array([i for i, name in enumerate(self.parameter_names) if name.split('[')[0] in parameters])
+
+        # Measurements
+        t0 = eval(config['t'], globals(), locals())[0]
+        if measurements.ndim != 2 or measurements.shape[1] != len(mesh.mesh_parts) + 1:
+            raise Exception('Invalid measurements')
+        measurements = measurements[measurements[:, 0] >= t0]
+        if measurements.shape[0] == 0:
+            raise Exception('Invalid measurements')
+        self.temperatures = measurements[:, 1:]
+        self.mask = ~np.isnan(self.temperatures)
+        # Integration must start at boundary condition time
+        self.prepended = measurements[0, 0] != t0
+        self.time_interval = np.concatenate(([t0], measurements[:, 0])) if self.prepended else measurements[:, 0]
+
+        # Boundary condition (or stationary solution guess)
+        self.y0_guess = np.array(config['y0'][1:], dtype=float)
+        # Boundary condition, updated after each iterate
+        self.y0 = self.y0_guess
+
+        # Last evaluated iterate
+        self.last_x = None
+        self.last_residual = None
+        self.last_jacobian = None
+
+
+    def make_config_from_json(self) -> Config:
+        """Creates config from raw .json config.
+        """
+
+        return Config(self.config['eps'], self.config['c'], self.config['lambda'], self.config['Q_R'], self.config['t'])
+
+
+    def make_config(self, x: ndarray) -> Config:
+        """Creates config with fitted parameters replaced by x.
+
+        Args:
+            x (ndarray): fitted parameters values.
+
+        Returns:
+            Config: config.
+        """
+
+        n = len(self.config['eps'])
+
+        # Full parameters vector
+        parameters = self.parameters.copy()
+        parameters[self.fitted] = x
+
+        # Unpack lambda
+        therm_cond_coefs = np.array(self.config['lambda'], dtype=float)
+        therm_cond_coefs[self.lambda_indices[:, 0], self.lambda_indices[:, 1]] = parameters[2*n:]
+
+        return Config(parameters[:n], parameters[n:2*n], therm_cond_coefs, self.config['Q_R'], self.config['t'])
+
+
+    def evaluate(self, x: ndarray) -> None:
+        """Evaluates residual and its jacobian in x with one augmented integration.
+
+        Args:
+            x (ndarray): fitted parameters values.
+        """
+
+        # Residual and jacobian are requested for the same iterate one after another
+        if self.last_x is not None and np.array_equal(x, self.last_x):
+            return
+
+        config = self.make_config(x)
+
+        # Resolve y0
+        if self.config['y0'][0] == 'y0':
+            y0 = self.y0
+            y0_sensitivities = None
+        else:
+            # Warm start from previous iterate stationary solution
+            y0, _, ier, message = optimize.fsolve(EquationEvaluator(self.mesh, config).eval_equation_stationary, self.y0,
+                                                  full_output=True)
+            if ier != 1:
+                raise Exception('Stationary solution did not converge: ' + message)
+            y0_sensitivities = SensitivityEvaluator(self.mesh, config).stationary_sensitivities(y0)
+            self.y0 = y0
+
+        # Temperatures and sensitivities
+        temperatures, sensitivities = utils.calculate_sensitivities(self.mesh, config, y0, self.time_interval,
+                                                                    y0_sensitivities=y0_sensitivities)
+        if self.prepended:
+            temperatures, sensitivities = temperatures[1:], sensitivities[1:]
+
+        self.last_x = np.array(x)
+        self.last_residual = (temperatures - self.temperatures)[self.mask]
+        self.last_jacobian = sensitivities[:, :, self.fitted][self.mask]
+
+
+    def residual(self, x: ndarray) -> ndarray:
+        """Evaluates difference between simulated and measured temperatures.
+        """
+
+        self.evaluate(x)
+        return self.last_residual
+
+
+    def jacobian(self, x: ndarray) -> ndarray:
+        """Evaluates residual jacobian from sensitivities.
+        """
+
+        self.evaluate(x)
+        return self.last_jacobian
+
+
+    def fit(self, x0: ndarray = None) -> optimize.OptimizeResult:
+        """Minimizes residual with least squares.
+
+        Args:
+            x0 (ndarray, optional): initial guess. Defaults to config values.
+
+        Returns:
+            optimize.OptimizeResult: least squares result.
+        """
+
+        if x0 is None:
+            x0 = self.parameters[self.fitted]
+
+        # Every fit starts from config boundary condition, regardless of previous fits
+        self.y0 = self.y0_guess
+        self.last_x = None
+
+        # Parameters are physically positive
+        return optimize.least_squares(self.residual, x0, jac=self.jacobian, bounds=(0, np.inf), x_scale='jac')
+
+
+    def save_config(self, filepath: str, x: ndarray) -> None:
+        """Writes config with fitted parameters to .json file.
+
+        Args:
+            filepath (str): path to file.
+            x (ndarray): fitted parameters values.
+        """
+
+        config = self.make_config(x)
+
+        # Keep Q_R, y0 and t as is
+        output = dict(self.config)
+        output['eps'] = config.eps.tolist()
+        output['c'] = config.c.tolist()
+        output['lambda'] = config.therm_cond_coefs.tolist()
+
+        with open(filepath, 'w') as f:
+            json.dump(output, f, indent='\t')
+
+
+def fit_candidate(calibrator: Calibrator, x0: ndarray) -> optimize.OptimizeResult:
+    """Fits single multi-start candidate (top level for process pool).
+
+    Returns:
+        optimize.OptimizeResult: least squares result or None if fit failed.
+    """
+
+    try:
+        return calibrator.fit(x0)
+    except Exception as e:
+        # Failed candidate must not stop the others
+        print('Calibration candidate failed:', e)
+        return None
+
+
+def calibrate(mesh: Mesh, config_filepath: str, measurements_filepaths: list[str], output_filepath: str,
+              parameters=('eps', 'c', 'lambda'), starts=1, workers=1, seed=None) -> optimize.OptimizeResult:
+    """Fits config parameters to measured temperatures and writes fitted config.
+
+    Args:
+        mesh (Mesh): model.
+        config_filepath (str): path to .json config.
+        measurements_filepaths (list[str]): paths to .csv measurements, see load_measurements.
+        output_filepath (str): path to fitted .json config.
+        parameters (tuple, optional): parameters to fit. Defaults to ('eps', 'c', 'lambda').
+        starts (int, optional): number of multi-start candidates, first one is config itself. Defaults to 1.
+        workers (int, optional): number of processes to evaluate candidates. Defaults to 1.
+        seed (_type_, optional): random seed for candidates. Defaults to None.
+
+    Returns:
+        optimize.OptimizeResult: best least squares result.
+
+    Raises:
+        Exception: every candidate failed (always the case for 'x0' configs, see Calibrator).
+    """
+
+    with open(config_filepath) as f:
+        config = json.load(f)
+    calibrator = Calibrator(mesh, config, load_measurements(measurements_filepaths), parameters)
+
+    # Candidates are config values scaled log-uniformly in [1/2, 2]
+    x0 = calibrator.parameters[calibrator.fitted]
+    rng = np.random.default_rng(seed)
+    candidates = [x0] + [x0 * 2**rng.uniform(-1, 1, x0.shape) for _ in range(starts - 1)]
+
+    # Fit candidates
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(fit_candidate, [calibrator] * len(candidates), candidates))
+    else:
+        results = [fit_candidate(calibrator, candidate) for candidate in candidates]
+
+    # Best candidate
+    results = [result for result in results if result is not None]
+    if not results:
+        raise Exception('Calibration failed for every candidate')
+    result = min(results, key=lambda result: result.cost)
+    calibrator.save_config(output_filepath, result.x)
+
+    return result
\ No newline at end of file
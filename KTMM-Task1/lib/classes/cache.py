@@ -0,0 +1,270 @@
+###########
+# IMPORTS #
+###########
+
+
+# Files
+import os
+import time
+from contextlib import suppress
+# Broken .npz files
+import zlib
+import zipfile
+# Hashing
+import hashlib
+# Expressions normalization
+import ast
+# .json normalization
+import json
+# LRU order
+from collections import OrderedDict
+# Handy arrays
+import numpy as np
+# Custom modules
+from lib.classes.mesh import Mesh
+
+# For annotations
+from numpy import ndarray
+
+
+###########################
+# Simulation result cache #
+###########################
+
+
+class ResultCache:
+    """Content-addressed cache of simulation results with in-memory and on-disk (.npz) LRU tiers.
+    """
+
+    # Age after which unfinished writes are considered abandoned, seconds
+    TMP_MAX_AGE = 3600
+    # Bump on any change of stored results layout or of equation and solver code
+    VERSION = 1
+
+    def __init__(self, directory='.cache', memory_limit=64 * 2**20, disk_limit=512 * 2**20) -> None:
+        # On-disk tier
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+        self.disk_limit = disk_limit
+        self.evict_disk()
+
+        # In-memory tier, least recently used first
+        self.memory = OrderedDict()
+        self.memory_size = 0
+        self.memory_limit = memory_limit
+
+        # Statistics
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+
+    @staticmethod
+    def mesh_hash(mesh: Mesh) -> str:
+        """Hashes mesh geometry.
+
+        Args:
+            mesh (Mesh): model.
+
+        Returns:
+            str: hex digest.
+        """
+
+        sha = hashlib.sha256()
+
+        # Vertices
+        vertices = np.ascontiguousarray(mesh.vertices, dtype=np.float64)
+        sha.update(str(vertices.shape).encode())
+        sha.update(vertices.tobytes())
+
+        # Faces of each mesh part
+        for mesh_part in mesh.mesh_parts:
+            faces = np.ascontiguousarray(mesh_part.faces, dtype=np.int64)
+            sha.update(str(faces.shape).encode())
+            sha.update(faces.tobytes())
+
+        return sha.hexdigest()
+
+
+    @staticmethod
+    def config_hash(config: dict) -> str:
+        """Hashes normalized raw .json config.
+
+        Args:
+            config (dict): raw .json config.
+
+        Returns:
+            str: hex digest.
+        """
+
+        # Same numbers and expressions regardless of formatting
+        normalized = {
+            'eps': np.asarray(config['eps'], dtype=float).tolist(),
+            'c': np.asarray(config['c'], dtype=float).tolist(),
+            'lambda': np.asarray(config['lambda'], dtype=float).tolist(),
+            'Q_R': ResultCache.expression_dump(config['Q_R']),
+            'y0': [config['y0'][0]] + np.asarray(config['y0'][1:], dtype=float).tolist(),
+            't': ResultCache.expression_dump(config['t'])
+        }
+
+        return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+
+    @staticmethod
+    def expression_dump(expression: str) -> str:
+        """Normalizes python expression to its syntax tree, so only formatting is ignored.
+
+        Args:
+            expression (str): python expression.
+
+        Returns:
+            str: syntax tree dump (expression as written if it is invalid).
+        """
+
+        try:
+            return ast.dump(ast.parse(expression.strip(), mode='eval'))
+        except SyntaxError:
+            return expression
+
+
+    def key(self, mesh_hash: str, config: dict, solver_options: dict) -> str:
+        """Makes cache key for simulation.
+
+        Args:
+            mesh_hash (str): mesh hash (see mesh_hash).
+            config (dict): raw .json config.
+            solver_options (dict): solver options.
+
+        Returns:
+            str: cache key.
+        """
+
+        options = json.dumps(solver_options, sort_keys=True, default=str)
+
+        return hashlib.sha256('\n'.join((str(self.VERSION), mesh_hash, self.config_hash(config), options)).encode()).hexdigest()
+
+
+    def get(self, key: str) -> dict[str, ndarray]:
+        """Looks up simulation result.
+
+        Args:
+            key (str): cache key.
+
+        Returns:
+            dict[str, ndarray]: read-only result arrays or None.
+        """
+
+        # In-memory tier
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.memory_hits += 1
+            return self.memory[key]
+
+        # On-disk tier
+        path = self.path(key)
+        if os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    result = {name: data[name] for name in data.files}
+            except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile, zlib.error):
+                # Broken file (may be already removed by another process)
+                with suppress(FileNotFoundError):
+                    os.remove(path)
+            else:
+                # Mark as recently used
+                os.utime(path)
+                self.put_memory(key, result)
+                self.disk_hits += 1
+                return result
+
+        self.misses += 1
+        return None
+
+
+    def put(self, key: str, result: dict[str, ndarray]) -> None:
+        """Stores simulation result in both tiers.
+
+        Args:
+            key (str): cache key.
+            result (dict[str, ndarray]): result arrays.
+        """
+
+        # Own copies, so caller can keep changing its arrays
+        result = {name: np.array(array) for name, array in result.items()}
+        self.put_memory(key, result)
+
+        # Write atomically, so interrupted write is never read
+        path = self.path(key)
+        tmp_path = '{path}.{pid}.tmp'.format(path=path, pid=os.getpid())
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **result)
+        os.replace(tmp_path, path)
+
+        self.evict_disk()
+
+
+    def evict_disk(self) -> None:
+        """Removes abandoned unfinished writes and least recently used files over disk limit.
+        """
+
+        files = []
+        for filename in os.listdir(self.directory):
+            path = os.path.join(self.directory, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Removed by another process
+                continue
+
+            if filename.endswith('.tmp') and time.time() - stat.st_mtime > self.TMP_MAX_AGE:
+                # Leftover of interrupted write
+                with suppress(FileNotFoundError):
+                    os.remove(path)
+            elif filename.endswith('.npz') or filename.endswith('.tmp'):
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        # Unfinished writes occupy disk too, but only results can be evicted
+        disk_size = sum(size for _, size, _ in files)
+        results = sorted(file for file in files if file[2].endswith('.npz'))
+        while disk_size > self.disk_limit and len(results) > 1:
+            _, size, path = results.pop(0)
+            with suppress(FileNotFoundError):
+                os.remove(path)
+            disk_size -= size
+
+
+    def put_memory(self, key: str, result: dict[str, ndarray]) -> None:
+        """Stores simulation result in memory tier.
+        """
+
+        # Shared between hits, so must not be changed in place
+        for array in result.values():
+            array.setflags(write=False)
+
+        if key in self.memory:
+            self.memory_size -= sum(array.nbytes for array in self.memory.pop(key).values())
+        self.memory[key] = result
+        self.memory_size += sum(array.nbytes for array in result.values())
+
+        # Evict least recently used results
+        while self.memory_size > self.memory_limit and len(self.memory) > 1:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_size -= sum(array.nbytes for array in evicted.values())
+
+
+    def path(self, key: str) -> str:
+        """Path to on-disk result.
+        """
+
+        return os.path.join(self.directory, key + '.npz')
+
+
+    def stats(self) -> dict:
+        """Cache hit/miss statistics.
+        """
+
+        return {'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'memory_entries': len(self.memory),
+                'memory_size': self.memory_size}
\ No newline at end of file
@@ -0,0 +1,141 @@
+###########
+# IMPORTS #
+###########
+
+
+# Handy arrays
+import numpy as np
+# Custom modules
+from lib.classes.mesh import Mesh
+from lib.classes.config import Config
+from lib.classes.eq_eval import EquationEvaluator
+
+# For annotations
+from numpy import ndarray
+
+
+#########################
+# Sensitivity Evaluator #
+#########################
+
+
+class SensitivityEvaluator(EquationEvaluator):
+    """Evaluates task equation augmented with forward sensitivities dy/dp,
+    where p = (eps, c, lambda).
+
+    Q_R is assumed to depend on t only, so it takes no part in jacobian df/dy.
+    """
+
+    def __init__(self, mesh: Mesh, config: Config) -> None:
+        super(SensitivityEvaluator, self).__init__(mesh, config)
+
+        # Mesh parts surfaces
+        self.surfaces = mesh.surfaces
+        # Intersections surfaces
+        self.intersections = mesh.intercestions_surfaces
+        # Thermal conductivity coefficients, which affect equation (only parts in contact)
+        self.lambda_indices = np.argwhere(self.intersections != 0)
+
+        # Parameters names
+        n = self.c.shape[0]
+        self.parameter_names = ['eps[{i}]'.format(i=i) for i in range(n)]
+        self.parameter_names += ['c[{i}]'.format(i=i) for i in range(n)]
+        self.parameter_names += ['lambda[{a},{b}]'.format(a=a, b=b) for a, b in self.lambda_indices]
+        # Parameters values
+        self.parameters = np.concatenate((config.eps,
+                                          config.c,
+                                          config.therm_cond_coefs[self.lambda_indices[:, 0], self.lambda_indices[:, 1]]))
+
+
+    def jacobian(self, y: ndarray) -> ndarray:
+        """Evaluates task equation jacobian df/dy.
+
+        Args:
+            y (ndarray): y vector.
+
+        Returns:
+            ndarray: jacobian matrix.
+        """
+
+        # Q_TC: d(K_ij * (y_i - y_j)) is K_ij on diagonal and -K_ij elsewhere
+        jacobian = np.diag(np.sum(self.k, axis=1)) - self.k
+
+        # Q_E
+        jacobian += np.diag(4 * self.heat_loss * y**3 / 100**4)
+
+        return jacobian / self.c[:, np.newaxis]
+
+
+    def parameters_derivative(self, y: ndarray, dy: ndarray) -> ndarray:
+        """Evaluates task equation derivative df/dp.
+
+        Args:
+            y (ndarray): y vector.
+            dy (ndarray): task equation value in y.
+
+        Returns:
+            ndarray: (mesh parts, parameters) matrix.
+        """
+
+        n = y.shape[0]
+        parts = np.arange(n)
+        df_dp = np.zeros((n, self.parameters.shape[0]))
+
+        # eps only affects Q_E of its own mesh part
+        df_dp[parts, parts] = -5.67 * self.surfaces * (y/100)**4 / self.c
+
+        # c divides whole right side
+        df_dp[parts, n + parts] = -dy / self.c
+
+        # lambda affects Q_TC of both parts in contact
+        for m, (a, b) in enumerate(self.lambda_indices):
+            flux = self.intersections[a, b] * (y[a] - y[b])
+            df_dp[a, 2*n + m] -= flux / self.c[a]
+            df_dp[b, 2*n + m] += flux / self.c[b]
+
+        return df_dp
+
+
+    def eval_equation_augmented(self, z: ndarray, t) -> ndarray:
+        """Evaluates task equation together with sensitivity equations dS/dt = J S + df/dp.
+
+        Args:
+            z (ndarray): y vector followed by flattened sensitivity matrix S = dy/dp.
+            t (_type_): time point.
+
+        Returns:
+            dz.
+        """
+
+        # Unpack state
+        n = self.c.shape[0]
+        y = z[:n]
+        s = z[n:].reshape((n, self.parameters.shape[0]))
+
+        # Task equation
+        dy = self.eval_equation(y, t)
+
+        # Sensitivity equations
+        ds = self.jacobian(y) @ s + self.parameters_derivative(y, dy)
+
+        return np.concatenate((dy, ds.ravel()))
+
+
+    def stationary_sensitivities(self, y: ndarray) -> ndarray:
+        """Evaluates sensitivities of stationary solution (see eval_equation_stationary).
+
+        Args:
+            y (ndarray): stationary solution.
+
+        Returns:
+            ndarray: (mesh parts, parameters) matrix dy/dp.
+        """
+
+        # Stationary equation has no Q_R, so its only solution is trivial y = 0,
+        # where jacobian reduces to singular conduction matrix and sensitivities are meaningless
+        jacobian = self.jacobian(y)
+        if np.linalg.cond(jacobian) > 1 / np.finfo(float).eps:
+            raise Exception('Stationary solution jacobian is singular')
+
+        # Implicit function theorem: dg/dy * dy/dp = -dg/dp (Q_R and c do not take part)
+        return -np.linalg.solve(jacobian, self.parameters_derivative(y, np.zeros(y.shape)))
\ No newline at end of file
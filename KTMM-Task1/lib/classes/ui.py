@@ -17,6 +17,7 @@ import scipy.optimize as optimize
 import lib.utils as utils
 from lib.classes.mesh import Mesh
 from lib.classes.config import Config
+from lib.classes.cache import ResultCache
 from lib.classes.plotting import MplCanvas
 from lib.classes.eq_eval import EquationEvaluator
 
@@ -49,6 +50,7 @@ class MainWindow(QtWidgets.QMainWindow):
         toolbar.addAction(button_mesh)
         # Set empty mesh
         self.mesh = None
+        self.mesh_hash = None
         
         # Config button
         self.button_config = QAction('Config', self)
@@ -59,6 +61,11 @@ class MainWindow(QtWidgets.QMainWindow):
         # Set empty config
         self.config = None
         
+        # Simulation results cache
+        self.cache = ResultCache()
+        # Options passed to odeint
+        self.solver_options = {}
+        
         # Plot canvas
         self.plot = MplCanvas()
         
@@ -97,6 +104,7 @@ class MainWindow(QtWidgets.QMainWindow):
         if filename != None:
             # Load model
             self.mesh = Mesh(filename)
+            self.mesh_hash = ResultCache.mesh_hash(self.mesh)
             
             # Enable config button
             self.button_config.setDisabled(False)
@@ -123,15 +131,34 @@ class MainWindow(QtWidgets.QMainWindow):
                 if {'eps', 'c', 'lambda', 'Q_R', 'y0', 't'} <= config.keys():
                     # Save config
                     self.config = Config(config['eps'], config['c'], config['lambda'], config['Q_R'], config['t'])
+                    self.time_interval = eval(self.config.t, globals(), locals())
                     
-                    # Resolve y0
-                    if config['y0'][0] == 'y0':
-                        self.config.y0 = np.array(config['y0'][1:])
-                    elif config['y0'][0] == 'x0':
-                        self.config.y0 = optimize.fsolve(EquationEvaluator(self.mesh, self.config).eval_equation_stationary,
-                                                         np.array(config['y0'][1:]))
+                    # Look up previous result
+                    key = self.cache.key(self.mesh_hash, config, self.solver_options)
+                    result = self.cache.get(key)
+                    
+                    if result is None:
+                        # Resolve y0
+                        if config['y0'][0] == 'y0':
+                            self.config.y0 = np.array(config['y0'][1:])
+                        elif config['y0'][0] == 'x0':
+                            self.config.y0 = optimize.fsolve(EquationEvaluator(self.mesh, self.config).eval_equation_stationary,
+                                                             np.array(config['y0'][1:]))
+                        else:
+                            raise Exception('Invalid config')
+                        
+                        # Solve ODE
+                        self.y0 = self.config.y0
+                        odeinit_output = self.solve()
+                        
+                        # Save result
+                        self.cache.put(key, {'y0': self.config.y0, 'output': odeinit_output})
                     else:
-                        raise Exception('Invalid config')
+                        # Reuse result
+                        self.config.y0 = result['y0']
+                        self.y0 = self.config.y0
+                        odeinit_output = result['output']
+                        self.show_output(odeinit_output)
                     
                     # Debug
                     print('Loaded config: ',
@@ -141,11 +168,7 @@ class MainWindow(QtWidgets.QMainWindow):
                           self.config.q_r,
                           self.config.y0,
                           self.config.t)
-                    
-                    # Solve ODE
-                    self.time_interval = eval(self.config.t, globals(), locals())
-                    self.y0 = self.config.y0
-                    odeinit_output = self.solve()
+                    print('Cache:', self.cache.stats())
                     
                     # Save .csv file
                     np.savetxt('output.csv', odeinit_output, delimiter = ",")
@@ -205,7 +228,17 @@ class MainWindow(QtWidgets.QMainWindow):
         """
         
         # Calculate temperatures
-        odeinit_output = utils.calculate_temperatures(self.mesh, self.config, self.y0, self.time_interval)
+        odeinit_output = utils.calculate_temperatures(self.mesh, self.config, self.y0, self.time_interval, **self.solver_options)
+        # Plot and step forward
+        self.show_output(odeinit_output)
+        
+        return odeinit_output
+    
+    
+    def show_output(self, odeinit_output: ndarray) -> None:
+        """Plots solution and moves to the next animation frame.
+        """
+        
         # Plot
         self.plot_data(odeinit_output)
         
@@ -213,8 +246,6 @@ class MainWindow(QtWidgets.QMainWindow):
         self.time_interval += 5
         # Update boundary condition
         self.y0 = odeinit_output[1, :]
-        
-        return odeinit_output
     
     
     def plot_data(self, odeinit_output: ndarray) -> None:
@@ -13,6 +13,7 @@ import scipy.integrate as integrate
 from lib.classes.mesh import Mesh
 from lib.classes.config import Config
 from lib.classes.eq_eval import EquationEvaluator
+from lib.classes.sens_eval import SensitivityEvaluator
 
 # For annotations
 from numpy import ndarray
@@ -38,7 +39,7 @@ def triangle_surface(vertices: ndarray) -> float:
     return math.sqrt(np.sum(cross**2)) / 2
 
 
-def calculate_temperatures(mesh: Mesh, config: Config, y0: ndarray, t: ndarray) -> ndarray:
+def calculate_temperatures(mesh: Mesh, config: Config, y0: ndarray, t: ndarray, **odeint_options) -> ndarray:
     """Calculates temperatures of mesh elements.
 
     Args:
@@ -46,10 +47,80 @@ def calculate_temperatures(mesh: Mesh, config: Config, y0: ndarray, t: ndarray)
         config (Config): config.
         y0 (ndarray): boundary condition.
         t (ndarray): time interval.
+        odeint_options: solver options passed to odeint.
 
     Returns:
         (time range, [mesh part1 temperature, ...])
     """
     
     # Solve ODE
-    return integrate.odeint(EquationEvaluator(mesh, config).eval_equation, y0, t)
\ No newline at end of file
+    return integrate.odeint(EquationEvaluator(mesh, config).eval_equation, y0, t, **odeint_options)
+
+
+def calculate_sensitivities(mesh: Mesh, config: Config, y0: ndarray, t: ndarray, y0_mode='y0', y0_sensitivities: ndarray = None) -> tuple[ndarray, ndarray]:
+    """Calculates temperatures of mesh elements and their sensitivities to eps, c and lambda in a single integration.
+
+    Args:
+        mesh (Mesh): model.
+        config (Config): config.
+        y0 (ndarray): boundary condition (for 'x0' mode - already solved stationary solution).
+        t (ndarray): time interval.
+        y0_mode (str, optional): config y0 mode, 'y0' (fixed) or 'x0' (stationary solution). Defaults to 'y0'.
+        y0_sensitivities (ndarray, optional): boundary condition sensitivities (mesh parts, parameters).
+            Defaults to zeros for 'y0' mode and to stationary solution sensitivities for 'x0' mode.
+
+    Returns:
+        (time range, [mesh part1 temperature, ...]) and (time range, mesh parts, parameters) sensitivities.
+    """
+    
+    evaluator = SensitivityEvaluator(mesh, config)
+    n, p = y0.shape[0], evaluator.parameters.shape[0]
+    
+    # Resolve boundary condition sensitivities
+    if y0_sensitivities is None:
+        if y0_mode == 'y0':
+            # Fixed boundary condition does not depend on parameters
+            y0_sensitivities = np.zeros((n, p))
+        elif y0_mode == 'x0':
+            # Stationary solution depends on eps and lambda (raises for singular jacobian)
+            y0_sensitivities = evaluator.stationary_sensitivities(y0)
+        else:
+            raise Exception('Invalid config')
+    
+    # Solve augmented ODE
+    odeinit_output = integrate.odeint(evaluator.eval_equation_augmented, np.concatenate((y0, y0_sensitivities.ravel())), t)
+    
+    return odeinit_output[:, :n], odeinit_output[:, n:].reshape((len(t), n, p))
+
+
+def rank_parameters(mesh: Mesh, config: Config, sensitivities: ndarray) -> list[list[tuple[str, float]]]:
+    """Ranks parameters importance for each mesh part.
+
+    Importance is RMS over time of scaled sensitivity p * dT/dp,
+    i.e. temperature change for 100% change of parameter.
+
+    Args:
+        mesh (Mesh): model.
+        config (Config): config.
+        sensitivities (ndarray): sensitivities from calculate_sensitivities with the same mesh and config.
+
+    Returns:
+        list[list[tuple[str, float]]]: for each mesh part, (parameter name, importance) sorted by importance.
+    """
+    
+    evaluator = SensitivityEvaluator(mesh, config)
+    
+    # Sensitivities must come from the same mesh and config
+    if sensitivities.ndim != 3 or sensitivities.shape[1:] != (len(mesh.surfaces), evaluator.parameters.shape[0]):
+        raise Exception('Invalid sensitivities')
+    
+    # Scaled sensitivities RMS, (mesh parts, parameters)
+    importance = np.sqrt(np.mean((sensitivities * evaluator.parameters)**2, axis=0))
+    
+    # Sort parameters for each mesh part
+    ranking = []
+    for part_importance in importance:
+        order = np.argsort(part_importance)[::-1]
+        ranking.append([(evaluator.parameter_names[i], float(part_importance[i])) for i in order])
+    
+    return ranking
\ No newline at end of file